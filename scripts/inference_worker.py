@@ -0,0 +1,116 @@
+"""
+center-object inference process
+Runs the optional yowo engine on camera frames that the control process
+leaves in shared memory. Deliberately free of robot_sdk: main.py starts
+this file as a fresh interpreter, which imports only this module, never
+the hardware SDK or the caller's __main__.
+"""
+
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Connection
+import sys
+
+import numpy as np
+
+try:
+    import yowo  # optional accelerated inference runtime
+except ImportError:
+    yowo = None
+
+FRAME_SHAPE = (480, 640, 3)
+# yowo backends in order of preference; onnx-cpu is the no-accelerator fallback
+BACKENDS = ("tensorrt", "onnx-gpu", "openvino", "onnx-cpu")
+# Weight precisions to try on each backend; fp32 is the always-supported fallback
+PRECISIONS = ("fp16", "fp32")
+# What InferenceEngine() raises for a backend or precision it can't serve;
+# anything else (a broken install, a bug) is not a reason to try the next one
+ENGINE_ERRORS = (RuntimeError, OSError, ValueError)
+
+
+def load_engine(confidence):
+    """
+    Load the yowo engine on the first usable backend. Returns (engine or
+    None, [(backend, precision, error message)] for each rejected pair).
+    """
+    if yowo is None:
+        return None, [("*", "*", "yowo is not importable in the inference process")]
+    rejected = []
+    for backend, precision in [(b, p) for b in BACKENDS for p in PRECISIONS]:
+        try:
+            engine = yowo.InferenceEngine(
+                backend=backend, precision=precision, confidence_threshold=confidence
+            )
+        except ENGINE_ERRORS as e:
+            rejected.append((backend, precision, f"{type(e).__name__}: {e}"))
+            continue
+        return engine, rejected
+    return None, rejected
+
+
+def raw_detections(detections, class_ids):
+    """
+    Reduce detections to picklable (labels, confidences, boxes); labels are
+    class ids when `class_ids` is set, else class names.
+    """
+    n = len(detections)
+    if class_ids:
+        labels = [det.class_id for det in detections]
+    else:
+        labels = [det.class_name for det in detections]
+    confidences = np.fromiter((det.confidence for det in detections), dtype=np.float64, count=n)
+    boxes = np.array([det.bbox for det in detections], dtype=np.float64).reshape(n, 4)
+    return labels, confidences, boxes
+
+
+def _attach(name):
+    """Map a frame buffer created, and later unlinked, by the control process."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Otherwise this process's resource tracker unlinks it on exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def serve(conn, confidence, class_ids):
+    """
+    Owns the yowo engine, so YOLO never contends for the control process's
+    GIL. Talks to the control process over the connection `conn`.
+    
+    Sends (whether an engine loaded, rejected backends), then answers each
+    (seq, shared-memory names) request with (seq, one raw_detections() per
+    frame), or (seq, exception). Stops on None or when the control process
+    goes away.
+    """
+    engine, rejected = load_engine(confidence)
+    conn.send((engine is not None, rejected))
+    if engine is None:
+        return
+    
+    views = {}  # shared-memory name -> (SharedMemory, frame view)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        seq, names = request
+        frames = []
+        for name in names:
+            if name not in views:
+                shm = _attach(name)
+                views[name] = (shm, np.ndarray(FRAME_SHAPE, dtype=np.uint8, buffer=shm.buf))
+            frames.append(views[name][1])
+        source = frames[0] if len(frames) == 1 else frames
+        try:
+            out = [raw_detections(r.detections, class_ids) for r in engine.stream(yowo.open_source(source))]
+        except Exception as e:
+            out = e
+        conn.send((seq, out))
+
+
+# Started by main._get_worker() as: python inference_worker.py <fd> <confidence> <class_ids>
+if __name__ == "__main__":
+    serve(Connection(int(sys.argv[1])), float(sys.argv[2]), sys.argv[3] == "1")
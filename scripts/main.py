@@ -1,13 +1,353 @@
 """
 center-object skill
 Centers a detected object in the wrist camera view by moving the robot base.
-Includes rotation search (±20°) when object is not initially visible.
+Includes rotation search when object is not initially visible.
 """
 
-from robot_sdk import base, yolo
+from robot_sdk import base, camera, yolo
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+import atexit
+import hashlib
+import inspect
+import itertools
+import logging
 import math
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import threading
 import time
 
+import numpy as np
+
+import inference_worker
+from inference_worker import FRAME_SHAPE
+
+try:
+    from numba import njit
+except ImportError:  # run the kernels as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+CENTER_U, CENTER_V = 320, 240
+CONFIDENCE = 0.15
+SETTLE_TIME = 0.3  # seconds after a base move returns until frames are usable
+SETTLE_TIMEOUT = 0.5  # upper bound on waiting for the SDK's settled signal
+SCAN_SPEED = 0.5  # rad/s for the continuous rotation search
+_RAD_10, _RAD_30, _RAD_60, _RAD_120 = map(math.radians, (10, 30, 60, 120))
+SCAN_ARC = _RAD_120  # the scan stays within ±SCAN_ARC of the start heading
+SCAN_POLL = 0.02  # seconds between heading updates while scanning
+# Frames the camera driver may already hold queued when a capture is requested
+STALE_FRAMES = 1
+WORKER_START_TIMEOUT = 120  # seconds; TensorRT engine builds can be slow
+INFER_TIMEOUT = 10  # seconds to wait for the inference process per request
+WORKER_POLL = 0.5  # seconds between liveness checks while waiting on it
+
+# Best target detection; bbox is (x1, y1, x2, y2) in pixels
+Detection = namedtuple("Detection", ["bbox", "confidence"])
+
+logger = logging.getLogger("center_object")
+# Progress goes to stdout as plain lines, the way the skill always printed it
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_handler)
+logger.propagate = False
+
+# SDK "motion complete" wait, when available; otherwise moves get a fixed settle
+_wait_until_settled = getattr(base, "wait_until_settled", None)
+# Velocity control lets the rotation search scan instead of stepping
+_can_scan = hasattr(base, "set_angular_velocity") and hasattr(base, "stop")
+# In-place capture, when camera.capture_image() accepts an out= buffer
+try:
+    _capture_into = "out" in inspect.signature(camera.capture_image).parameters
+except (TypeError, ValueError):  # no introspectable signature; copy instead
+    _capture_into = False
+
+_worker = None  # (process, connection) once started; False if unavailable
+_worker_lock = threading.Lock()  # one request/result round trip at a time
+_request_ids = itertools.count()  # tags requests so late replies can be told apart
+# The SDK's own label map, when it publishes one; detections then carry class_id
+_names_to_id = getattr(yolo, "names_to_id", None)
+_class_ids = {}  # class name, as reported and lower-cased -> integer id
+_new_class_ids = itertools.count()  # ids for names the SDK label map doesn't cover
+_gains = {}  # camera_id -> calibrated (gain_x, gain_y), meters per pixel
+_camera_lock = threading.Lock()
+_last_inference = {}  # camera_id -> (frame digest, detections)
+_frame_buffers = {}  # (camera_id, slot) -> (SharedMemory, uint8 frame view)
+# Single worker: detection runs in the background while the scan keeps turning
+_detector = ThreadPoolExecutor(max_workers=1, thread_name_prefix="center-detect")
+
+
+def _reply(proc, conn, timeout, seq=None):
+    """
+    Next reply from the inference process, skipping replies to requests
+    other than `seq`; None on timeout or if the process has exited.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if conn.poll(max(0.0, min(WORKER_POLL, deadline - time.monotonic()))):
+                out = conn.recv()
+            elif proc.poll() is not None or time.monotonic() >= deadline:
+                return None
+            else:
+                continue
+        except (EOFError, OSError):  # the process closed its end or died
+            return None
+        if seq is None:
+            return out
+        if out[0] == seq:
+            return out[1]
+
+
+def _get_worker():
+    """Start the inference process once; None if yowo has no usable backend."""
+    global _worker
+    if _worker is None:
+        _worker = False
+        if inference_worker.yowo is not None:
+            # A fresh interpreter, not a fork (the engine may use CUDA, and this
+            # process already runs threads) and not multiprocessing's spawn,
+            # which re-runs the caller's __main__ and with it robot_sdk
+            conn, child_conn = mp.Pipe()
+            proc = subprocess.Popen(
+                [
+                    sys.executable, inference_worker.__file__, str(child_conn.fileno()),
+                    repr(CONFIDENCE), "1" if _names_to_id is not None else "0",
+                ],
+                pass_fds=(child_conn.fileno(),),
+                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+            )
+            child_conn.close()
+            loaded, rejected = _reply(proc, conn, WORKER_START_TIMEOUT) or (False, [])
+            for backend, precision, error in rejected:
+                logger.debug("[center] yowo %s/%s unavailable: %s", backend, precision, error)
+            if loaded:
+                _worker = (proc, conn)
+            else:
+                # center_object() keeps this logger above DEBUG, so say why here too
+                reasons = "; ".join(f"{b}/{p}: {e}" for b, p, e in rejected)
+                logger.warning(
+                    "[center] No usable yowo backend, using yolo.segment_camera (%s)",
+                    reasons or "inference process did not start",
+                )
+                proc.kill()
+                proc.wait()
+                conn.close()
+    return _worker or None
+
+
+def _stop_worker():
+    """Terminate an unresponsive inference process; detection falls back to the SDK."""
+    global _worker
+    proc, conn = _worker
+    _worker = False
+    proc.kill()
+    proc.wait()
+    conn.close()
+
+
+def _run_engine(buffers):
+    """
+    Run the inference process on the given (camera_id, slot) frame buffers.
+    Returns None, having shut the process down, if it died, timed out or
+    the engine raised.
+    """
+    with _worker_lock:
+        if not _worker:
+            return None
+        proc, conn = _worker
+        seq = next(_request_ids)
+        try:
+            conn.send((seq, [_frame_buffers[key][0].name for key in buffers]))
+        except OSError:  # the process is gone; _reply() notices
+            pass
+        out = _reply(proc, conn, INFER_TIMEOUT, seq)
+        if out is None:
+            logger.warning("[center] Inference process not responding, falling back to yolo.segment_camera")
+        elif isinstance(out, Exception):
+            logger.warning("[center] yowo inference failed (%s: %s), falling back to yolo.segment_camera", type(out).__name__, out)
+        else:
+            return out
+        _stop_worker()
+        return None
+
+
+@atexit.register
+def _shutdown():
+    """Stop the inference process and free the shared frame buffers."""
+    if _worker:
+        try:
+            _worker[1].send(None)
+        except OSError:
+            pass
+    while _frame_buffers:
+        shm, _ = _frame_buffers.popitem()[1]
+        shm.unlink()
+        try:
+            shm.close()
+        except BufferError:  # a frame view is still referenced; the OS reclaims it at exit
+            pass
+
+
+def _frame_buffer(camera_id, slot):
+    """Shared-memory frame for (camera_id, slot), readable by the inference process."""
+    entry = _frame_buffers.get((camera_id, slot))
+    if entry is None:
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(FRAME_SHAPE)))
+        buf = np.ndarray(FRAME_SHAPE, dtype=np.uint8, buffer=shm.buf)
+        entry = _frame_buffers[camera_id, slot] = (shm, buf)
+    return entry[1]
+
+
+def _capture(camera_id, slot):
+    """Capture into the shared buffer for (camera_id, slot), in place when supported."""
+    buf = _frame_buffer(camera_id, slot)
+    if _capture_into:
+        camera.capture_image(camera_id, out=buf)
+    else:
+        buf[...] = camera.capture_image(camera_id)
+    return buf
+
+
+def capture_fresh(camera_id, slot=0):
+    """
+    Capture a frame taken after the call, not one left queued by the driver.
+    
+    The wrist camera is owned by robot_sdk, so there is no direct control of
+    its buffer count; instead drop up to STALE_FRAMES queued frames first.
+    Frames land in a buffer reused on every call with the same slot, so
+    callers holding several frames at once must use distinct slots.
+    """
+    with _camera_lock:
+        for _ in range(STALE_FRAMES):
+            _capture(camera_id, slot)
+        return _capture(camera_id, slot)
+
+
+def _segment_frame(camera_id, slot=0):
+    """Capture and detect one frame, reusing the result for repeated pixels."""
+    img = capture_fresh(camera_id, slot)
+    digest = hashlib.blake2b(img, digest_size=8).digest()
+    cached = _last_inference.get(camera_id)
+    if cached and cached[0] == digest:
+        return cached[1]  # same pixels as last call, skip the YOLO pass
+    raw = _run_engine([(camera_id, slot)])
+    if raw is None:
+        return None
+    detections = _as_arrays(*raw[0])
+    _last_inference[camera_id] = (digest, detections)
+    return detections
+
+
+def _segment_batch(camera_id, slots):
+    """
+    Run YOLO over already captured frames in one engine call (yowo path
+    only); None if the inference process is gone.
+    """
+    batch = _run_engine([(camera_id, slot) for slot in slots])
+    if batch is None:
+        return None
+    return [_as_arrays(*raw) for raw in batch]
+
+
+def _class_id(name):
+    """Stable integer id for a class name, case-insensitive."""
+    cid = _class_ids.get(name)
+    if cid is None:
+        # Only the first sighting of each spelling pays for lower()
+        key = name.lower()
+        cid = _class_ids.get(key)
+        if cid is None:
+            cid = _names_to_id.get(key, -1) if _names_to_id is not None else next(_new_class_ids)
+        _class_ids[name] = _class_ids[key] = cid
+    return cid
+
+
+def _as_arrays(labels, confidences, boxes):
+    """(class_ids, confidences, boxes) arrays from raw_detections() output."""
+    if _names_to_id is not None:
+        class_ids = np.array(labels, dtype=np.int64)
+    else:
+        class_ids = np.fromiter((_class_id(name) for name in labels), dtype=np.int64, count=len(labels))
+    return class_ids, confidences, boxes
+
+
+def _pick(detections, target_id):
+    """Highest-confidence detection of the target class, or None."""
+    class_ids, confidences, boxes = detections
+    idxs = np.flatnonzero(class_ids == target_id)
+    if not len(idxs):
+        return None
+    best = idxs[np.argmax(confidences[idxs])]
+    return Detection(tuple(boxes[best].tolist()), float(confidences[best]))
+
+
+def _make_inferencer(target, target_id, camera_id):
+    """
+    Bind the parts of a detection call that never change during a centering
+    run (class filter, camera, backend) once, returning a no-argument
+    function that only processes the new frame. `target_id` is the
+    already resolved _class_id(target).
+    """
+    def segment_sdk():
+        with _camera_lock:
+            result = yolo.segment_camera(target, camera_id=camera_id, confidence=CONFIDENCE)
+        return _as_arrays(*inference_worker.raw_detections(result.detections, _names_to_id is not None))
+    
+    if _get_worker() is None:
+        segment = segment_sdk
+    else:
+        def segment():
+            # The inference process can go away mid-run; keep going on the SDK
+            detections = _segment_frame(camera_id) if _worker else None
+            return segment_sdk() if detections is None else detections
+    
+    def infer():
+        return _pick(segment(), target_id)
+    
+    return infer
+
+
+def _move(**delta):
+    """Issue a base move and return the time move_delta() returned."""
+    base.move_delta(**delta)
+    return time.monotonic()
+
+
+def _settle(moved, settle=SETTLE_TIME):
+    """
+    Wait until the base reports it is at rest, or, if the SDK can't say,
+    sleep out whatever is left of the settle time since `moved`, the
+    time returned by _move().
+    """
+    if _wait_until_settled is not None:
+        _wait_until_settled(timeout=SETTLE_TIMEOUT)
+        return
+    time.sleep(max(0.0, settle - (time.monotonic() - moved)))
+
+
+@njit(cache=True)
+def _step(x1, y1, x2, y2, gain_x, gain_y, err_points, damping_points, max_step, tolerance):
+    """
+    Bbox center, pixel error, clamped base step and the centered check.
+    
+    The damping applied to each axis is interpolated from
+    (err_points, damping_points) at that axis' absolute error.
+    """
+    u = (x1 + x2) / 2
+    v = (y1 + y2) / 2
+    err = np.array([v - CENTER_V, u - CENTER_U])  # (v, u) error drives (dx, dy)
+    k = -np.array([gain_x, gain_y]) * np.interp(np.abs(err), err_points, damping_points)
+    step = np.clip(k * err, -max_step, max_step)
+    done = abs(err[0]) < tolerance and abs(err[1]) < tolerance
+    return u, v, float(err[1]), float(err[0]), float(step[0]), float(step[1]), done
+
 
 def center_object(
     target="banana",
@@ -15,7 +355,9 @@ def center_object(
     max_iterations=50,
     gain=0.00225,
     camera_id="309622300814",
-    verbose=True
+    verbose=True,
+    inference_frequency=1,
+    autotune=True
 ):
     """
     Center a target object in the wrist camera by moving the base.
@@ -24,33 +366,78 @@ def center_object(
         target: YOLO class name to detect
         tolerance: Pixels from center to consider "centered"
         max_iterations: Maximum centering attempts
-        gain: Movement gain (meters per pixel of error)
+        gain: Movement gain (meters per pixel of error); with autotune,
+            the fallback when calibration cannot measure the camera
         camera_id: Wrist camera serial number
         verbose: Print progress messages
+        inference_frequency: Run YOLO every Nth iteration once within
+            3x tolerance; skipped iterations extrapolate the position
+            from the commanded move (1 = detect every iteration)
+        autotune: On the first call for a camera, measure meters per
+            pixel on each axis with two small moves and use that instead
+            of `gain`; the result is cached per camera_id
     
     Returns:
         (success: bool, position: tuple or None)
         - (True, (u, v)) if object centered at pixel position
         - (False, None) if failed
     """
-    CENTER_U, CENTER_V = 320, 240
     MAX_STEP = 0.04
-    DAMPING = 0.5
-    def log(msg):
-        if verbose:
-            print(msg)
-    
-    def detect_target():
-        result = yolo.segment_camera(target, camera_id=camera_id, confidence=0.15)
-        for det in result.detections:
-            if det.class_name.lower() == target.lower():
-                return det
-        return None
+    # Gain schedule on each axis' pixel error: below the old flat 0.5 at the
+    # edge of tolerance, where the loop acts on its smallest errors, rising
+    # for large errors. The far point moves out with large tolerances so the
+    # x-points keep increasing
+    ERR_POINTS = np.array([tolerance, 3.0 * tolerance, max(200.0, 4.0 * tolerance)])
+    DAMPING_POINTS = np.array([0.45, 0.6, 0.8])
+    FINE_BAND = 3 * tolerance  # error band in which detections may be skipped
+    SATURATED_SKIPS = 2  # blind MAX_STEP moves allowed between detections
+    CAL_STEP = 0.02  # calibration move per axis (m)
+    MIN_CAL_SHIFT = 3  # pixels; smaller responses are treated as noise
+    U_TOLERANCE = 80  # pixels from center to stop rotating
+    
+    logger.setLevel(logging.INFO if verbose else logging.WARNING)
+    
+    target_id = _class_id(target)
+    detect_target = _make_inferencer(target, target_id, camera_id)
+    
+    def settle_and_detect(moved):
+        """Detect on the first frame after the move that returned at `moved` settles"""
+        _settle(moved)
+        return detect_target()
+    
+    def move_and_detect(**delta):
+        """Move the base, let it settle, then detect"""
+        return settle_and_detect(_move(**delta))
+    
+    def calibrate(det):
+        """Measure meters per pixel on each axis; returns (gains, latest detection)"""
+        gains = []
+        moved = {}
+        complete = True  # both axes measured, not defaulted
+        for axis, lo, hi, center in (("dx", 1, 3, CENTER_V), ("dy", 0, 2, CENTER_U)):
+            before = (det.bbox[lo] + det.bbox[hi]) / 2
+            # A positive move shifts the object towards positive error; move
+            # against the error so calibration doesn't push it out of view
+            step = -CAL_STEP if before > center else CAL_STEP
+            det = move_and_detect(**{axis: step})
+            moved[axis] = -step
+            if det is None:
+                # Back to where the object was last seen
+                logger.info("[center] Calibration lost detection, using gain=%s", gain)
+                return (gain, gain), move_and_detect(**moved)
+            shift = ((det.bbox[lo] + det.bbox[hi]) / 2 - before) * (step / CAL_STEP)
+            if shift < MIN_CAL_SHIFT:
+                gains.append(gain)
+                complete = False
+            else:
+                gains.append(min(4 * gain, max(gain / 4, CAL_STEP / shift)))
+        logger.info("[center] Calibrated gain: x=%.5f, y=%.5f m/px", gains[0], gains[1])
+        if complete:
+            _gains[camera_id] = tuple(gains)  # a partial measurement is retried next call
+        return tuple(gains), det
     
     def rotational_center(det):
         """After finding object, rotate more to center it horizontally (U axis)"""
-        U_TOLERANCE = 80  # pixels from center
-        FINE_ANGLE = math.radians(10)  # 10° fine rotation steps
         MAX_FINE_ROTATIONS = 6
         
         for i in range(MAX_FINE_ROTATIONS):
@@ -59,158 +446,263 @@ def center_object(
             u_err = u - CENTER_U
             
             if abs(u_err) < U_TOLERANCE:
-                log(f"[center] Rotationally centered (u_err={u_err:.0f})")
+                logger.info("[center] Rotationally centered (u_err=%.0f)", u_err)
                 return det
             
             # Rotate towards center
             if u_err > 0:  # Object is right of center, rotate left (negative)
-                log(f"[center] Object right of center (u_err={u_err:.0f}), rotating -10°")
-                base.move_delta(dtheta=-FINE_ANGLE)
+                logger.info("[center] Object right of center (u_err=%.0f), rotating -10°", u_err)
+                det = move_and_detect(dtheta=-_RAD_10)
             else:  # Object is left of center, rotate right (positive)
-                log(f"[center] Object left of center (u_err={u_err:.0f}), rotating +10°")
-                base.move_delta(dtheta=FINE_ANGLE)
-            
-            time.sleep(0.3)
-            det = detect_target()
+                logger.info("[center] Object left of center (u_err=%.0f), rotating +10°", u_err)
+                det = move_and_detect(dtheta=_RAD_10)
             
             # Wiggle recovery if lost detection
             if det is None:
-                log(f"[center] Lost detection, wiggling to recover...")
+                logger.info("[center] Lost detection, wiggling to recover...")
                 wiggle_step = 0.02
                 for w in range(4):
                     dx = wiggle_step * (1 if w % 2 == 0 else -1)
                     dy = wiggle_step * (1 if (w // 2) % 2 == 0 else -1)
-                    base.move_delta(dx=dx, dy=dy)
-                    time.sleep(0.3)
-                    det = detect_target()
+                    det = move_and_detect(dx=dx, dy=dy)
                     if det:
-                        log(f"[center] Recovered detection after wiggle")
+                        logger.info("[center] Recovered detection after wiggle")
                         break
                 if det is None:
-                    log(f"[center] Lost detection during rotational centering")
+                    logger.info("[center] Lost detection during rotational centering")
                     return None
         
-        log(f"[center] Rotational centering done (max steps)")
+        logger.info("[center] Rotational centering done (max steps)")
         return det
     
+    def scan_rotate():
+        """Rotate continuously within ±SCAN_ARC, detecting in the background;
+        on a sighting, go back to where that frame was taken and center from there"""
+        heading = 0.0  # estimated from the commanded rate
+        swept = 0.0
+        direction = 1
+        found = None
+        
+        logger.info("[center] Scanning: rotating within ±%.0f°...", math.degrees(SCAN_ARC))
+        base.set_angular_velocity(direction * SCAN_SPEED)
+        try:
+            last = time.monotonic()
+            # Heading at submit time: the frame shows the view from there, not from
+            # wherever the base has turned to by the time the (slow) detection returns
+            pending, seen_at = _detector.submit(detect_target), heading
+            
+            while True:
+                time.sleep(SCAN_POLL)
+                now = time.monotonic()
+                heading += direction * SCAN_SPEED * (now - last)
+                swept += SCAN_SPEED * (now - last)
+                last = now
+                
+                # 0 -> +SCAN_ARC -> -SCAN_ARC covers the whole arc once
+                swept_all = swept >= 3 * SCAN_ARC
+                if swept_all:
+                    base.stop()  # the last detection may still show the object
+                elif direction * heading >= SCAN_ARC:
+                    direction = -direction
+                    base.set_angular_velocity(direction * SCAN_SPEED)
+                if not swept_all and not pending.done():
+                    continue
+                
+                sighting = pending.result()
+                if sighting:
+                    base.stop()
+                    _settle(_move(dtheta=seen_at - heading))  # undo the detection lag
+                    heading = seen_at
+                    # Back where the sighting was taken: a miss on the edge of the
+                    # view mustn't restart the scan, so fall back to the sighting
+                    found = detect_target() or sighting
+                    break
+                if swept_all:
+                    break
+                pending, seen_at = _detector.submit(detect_target), heading
+        finally:
+            base.stop()  # never leave the base spinning, whatever went wrong
+        
+        if found:
+            logger.info("[center] Found while scanning at ~%+.0f°, centering rotationally...", math.degrees(heading))
+            return rotational_center(found)
+        
+        logger.info("[center] Not found after ±%.0f° scan", math.degrees(SCAN_ARC))
+        _settle(_move(dtheta=-heading))
+        return None
+    
+    def search_rotate_batched():
+        """Sweep -60° to +60° capturing frames, then detect on all of them at once"""
+        headings = (-_RAD_60, -_RAD_30, _RAD_30, _RAD_60)
+        slots = range(len(headings))
+        heading = 0.0
+        
+        logger.info("[center] Searching: sweeping ±60° for a batched detection...")
+        for slot, h in zip(slots, headings):
+            _settle(_move(dtheta=h - heading))
+            heading = h
+            capture_fresh(camera_id, slot)
+        
+        batch = _segment_batch(camera_id, slots)
+        if batch is None:
+            _settle(_move(dtheta=-heading))
+            return search_rotate()  # the inference process is gone; search step by step
+        found = [(h, _pick(dets, target_id)) for h, dets in zip(headings, batch)]
+        # Prefer the smallest rotation, positive first, as the step-by-step search does
+        for h, det in sorted(found, key=lambda f: (abs(f[0]), -f[0])):
+            if det:
+                logger.info("[center] Found at %+.0f°, centering rotationally...", math.degrees(h))
+                _settle(_move(dtheta=h - heading))
+                return rotational_center(det)
+        
+        logger.info("[center] Not found after ±30° and ±60° search")
+        _settle(_move(dtheta=-heading))
+        return None
+    
     def search_rotate():
         """Rotate base ±30° then ±60° to search for object, then rotationally center"""
-        angle_30 = math.radians(30)
+        if _can_scan:
+            return scan_rotate()
+        if _get_worker() is not None:
+            return search_rotate_batched()
         
-        log(f"[center] Searching: rotating +30°...")
-        base.move_delta(dtheta=angle_30)
-        time.sleep(0.3)
-        det = detect_target()
+        logger.info("[center] Searching: rotating +30°...")
+        det = move_and_detect(dtheta=_RAD_30)
         if det:
-            log(f"[center] Found at +30°, centering rotationally...")
+            logger.info("[center] Found at +30°, centering rotationally...")
             return rotational_center(det)
         
-        log(f"[center] Searching: rotating -60° (to -30°)...")
-        base.move_delta(dtheta=-2*angle_30)
-        time.sleep(0.3)
-        det = detect_target()
+        logger.info("[center] Searching: rotating -60° (to -30°)...")
+        det = move_and_detect(dtheta=-2*_RAD_30)
         if det:
-            log(f"[center] Found at -30°, centering rotationally...")
+            logger.info("[center] Found at -30°, centering rotationally...")
             return rotational_center(det)
         
-        base.move_delta(dtheta=angle_30)
-        time.sleep(0.2)
-        
-        angle_60 = math.radians(60)
+        _settle(_move(dtheta=_RAD_30), 0.2)
         
-        log(f"[center] Searching: rotating +60°...")
-        base.move_delta(dtheta=angle_60)
-        time.sleep(0.3)
-        det = detect_target()
+        logger.info("[center] Searching: rotating +60°...")
+        det = move_and_detect(dtheta=_RAD_60)
         if det:
-            log(f"[center] Found at +60°, centering rotationally...")
+            logger.info("[center] Found at +60°, centering rotationally...")
             return rotational_center(det)
         
-        log(f"[center] Searching: rotating -120° (to -60°)...")
-        base.move_delta(dtheta=-2*angle_60)
-        time.sleep(0.3)
-        det = detect_target()
+        logger.info("[center] Searching: rotating -120° (to -60°)...")
+        det = move_and_detect(dtheta=-2*_RAD_60)
         if det:
-            log(f"[center] Found at -60°, centering rotationally...")
+            logger.info("[center] Found at -60°, centering rotationally...")
             return rotational_center(det)
         
-        log(f"[center] Not found after ±30° and ±60° search")
-        base.move_delta(dtheta=angle_60)
-        time.sleep(0.3)
+        logger.info("[center] Not found after ±30° and ±60° search")
+        _settle(_move(dtheta=_RAD_60))
         return None
     
-    log(f"[center] Starting centering for '{target}'")
-    log(f"[center] Tolerance: {tolerance}px, Max iter: {max_iterations}")
+    logger.info("[center] Starting centering for '%s'", target)
+    logger.info("[center] Tolerance: %spx, Max iter: %s", tolerance, max_iterations)
     
     # Initial detection
     target_det = detect_target()
     
     # If not found, do rotation search
     if target_det is None:
-        log(f"[center] Object not visible, starting rotation search...")
+        logger.info("[center] Object not visible, starting rotation search...")
         target_det = search_rotate()
         if target_det is None:
-            log(f"[center] FAILED - Object not found after search")
+            logger.info("[center] FAILED - Object not found after search")
             return False, None
     
+    if not autotune:
+        gain_x = gain_y = gain
+    elif camera_id in _gains:
+        gain_x, gain_y = _gains[camera_id]
+    elif _step(*target_det.bbox, gain, gain, ERR_POINTS, DAMPING_POINTS, MAX_STEP, tolerance)[-1]:
+        gain_x = gain_y = gain  # already centered; calibrating would move it off
+    else:
+        (gain_x, gain_y), target_det = calibrate(target_det)
+    
     consecutive_misses = 0
     wiggle_step = 0.02  # 2cm
+    predicted = False  # this iteration extrapolates instead of detecting
+    since_detect = 0
+    expected = None  # where the camera model puts the object after the last move
+    trust_model = True  # cleared once a detection shows the model is off
     
+    # target_det is the detection that found the object, then the one taken
+    # after each move settles
     for iteration in range(max_iterations):
-        result = yolo.segment_camera(target, camera_id=camera_id, confidence=0.15)
-        detections = result.detections
-        
-        target_det = None
-        for det in detections:
-            if det.class_name.lower() == target.lower():
-                target_det = det
-                break
+        if predicted:
+            # Camera model: one meter of base motion shifts the image 1/gain pixels
+            u += dy / gain_y
+            v += dx / gain_x
+            box = (u, v, u, v)  # degenerate box at the predicted center
+            since_detect += 1
         
-        if target_det is None:
+        if not predicted and target_det is None:
             consecutive_misses += 1
-            log(f"[center] Iter {iteration}: No '{target}' detected ({consecutive_misses}/10)")
+            logger.info("[center] Iter %d: No '%s' detected (%d/10)", iteration, target, consecutive_misses)
             
             if consecutive_misses >= 10:
-                log(f"[center] FAILED - 10 consecutive detection failures")
+                logger.info("[center] FAILED - 10 consecutive detection failures")
                 return False, None
             
             # Wiggle base slightly to recover detection
             dx = wiggle_step * (1 if consecutive_misses % 2 == 0 else -1)
             dy = wiggle_step * (1 if (consecutive_misses // 2) % 2 == 0 else -1)
-            log(f"[center] Wiggling base: dx={dx:.3f}m, dy={dy:.3f}m")
-            base.move_delta(dx=dx, dy=dy)
-            time.sleep(0.3)
+            logger.info("[center] Wiggling base: dx=%.3fm, dy=%.3fm", dx, dy)
+            expected = None
+            target_det = move_and_detect(dx=dx, dy=dy)
             continue
         
-        consecutive_misses = 0  # Reset on successful detection
+        if not predicted:
+            consecutive_misses = 0  # Reset on successful detection
+            since_detect = 0
+            
+            box = target_det.bbox
+            conf = target_det.confidence
         
-        # Get bbox center
-        x1, y1, x2, y2 = target_det.bbox
-        u = (x1 + x2) / 2
-        v = (y1 + y2) / 2
-        conf = target_det.confidence
+        u, v, u_err, v_err, dx, dy, done = _step(
+            *box, gain_x, gain_y, ERR_POINTS, DAMPING_POINTS, MAX_STEP, tolerance
+        )
         
-        u_err = u - CENTER_U
-        v_err = v - CENTER_V
+        if not predicted and trust_model and expected is not None:
+            miss = max(abs(u - expected[0]), abs(v - expected[1]))
+            if miss > tolerance:
+                # A wrong gain makes blind moves overshoot; detect after every move
+                trust_model = False
+                logger.info("[center] Move landed %.0fpx off prediction, no longer skipping detections", miss)
         
-        log(f"[center] Iter {iteration}: pos=({u:.0f}, {v:.0f}), err=({u_err:.0f}, {v_err:.0f}), conf={conf:.2f}")
+        if predicted:
+            logger.info("[center] Iter %d: predicted pos=(%.0f, %.0f), err=(%.0f, %.0f)", iteration, u, v, u_err, v_err)
+        else:
+            logger.info("[center] Iter %d: pos=(%.0f, %.0f), err=(%.0f, %.0f), conf=%.2f", iteration, u, v, u_err, v_err, conf)
         
-        if abs(u_err) < tolerance and abs(v_err) < tolerance:
-            log(f"[center] SUCCESS - Object centered at ({u:.0f}, {v:.0f})")
+        if done and not predicted:
+            logger.info("[center] SUCCESS - Object centered at (%.0f, %.0f)", u, v)
             return True, (u, v)
         
-        dx = -gain * v_err * DAMPING
-        dy = -gain * u_err * DAMPING
-        
-        dx = max(-MAX_STEP, min(MAX_STEP, dx))
-        dy = max(-MAX_STEP, min(MAX_STEP, dy))
+        logger.info("[center] Moving base: dx=%.4fm, dy=%.4fm", dx, dy)
         
-        log(f"[center] Moving base: dx={dx:.4f}m, dy={dy:.4f}m")
+        # Skip the next detection near the set-point (every Nth frame) or while
+        # the step is clamped to MAX_STEP, whose outcome the error barely
+        # affects. Never when the prediction says we are done: success is
+        # always confirmed by YOLO
+        u_next, v_next = u_err + dy / gain_y, v_err + dx / gain_x
+        saturated = abs(dx) >= MAX_STEP or abs(dy) >= MAX_STEP
+        predicted = trust_model and (
+            (
+                since_detect + 1 < inference_frequency
+                and abs(u_err) < FINE_BAND and abs(v_err) < FINE_BAND
+            )
+            or (saturated and since_detect < SATURATED_SKIPS)
+        ) and not (abs(u_next) < tolerance and abs(v_next) < tolerance)
         
-        base.move_delta(dx=dx, dy=dy)
-        time.sleep(0.3)
+        expected = (u + dy / gain_y, v + dx / gain_x)
+        moved = _move(dx=dx, dy=dy)
+        if not predicted:
+            # Settle only before a frame is used. Nothing can overlap it: the
+            # next step needs a detection on a frame captured after the settle
+            target_det = settle_and_detect(moved)
     
-    log(f"[center] FAILED - Max iterations ({max_iterations}) reached")
+    logger.info("[center] FAILED - Max iterations (%s) reached", max_iterations)
     return False, None
 
 